@@ -29,21 +29,34 @@ Created: 2024-12-21
 
 import cv2
 import numpy as np
+import os
 import time
 import datetime
 import argparse
+import threading
+import queue
+import struct
+from collections import deque
 from pathlib import Path
 import lgpio
 
 # Camera Configuration
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
+
+# Route the memory-bound HSV threshold through OpenCL (UMat) when available;
+# on platforms without it the ndarray path below is unchanged
+USE_OPENCL = cv2.ocl.haveOpenCL()
+if USE_OPENCL:
+    cv2.ocl.setUseOpenCL(True)
 #a
 # HSV Color Detection Configuration
 HSV_MIN = np.array([117, 141, 109], dtype=np.uint8)    # Lower bound of target color
 HSV_MAX = np.array([179, 255, 255], dtype=np.uint8)  # Upper bound of target color
 MIN_AREA = 10000    # Minimum area to consider a valid detection
 MAX_AREA = 22000  # Maximum area to consider a valid detection
+DETECT_SCALE = 2  # Detection runs at 1/DETECT_SCALE resolution; MIN_AREA means
+                  # a real target still spans thousands of pixels at half size
 
 # Servo Configuration
 GPIO_PIN = 17          # GPIO pin number for servo
@@ -54,6 +67,14 @@ MAX_DUTY = 12.5       # Duty cycle for 180 degrees
 OPEN_ANGLE = 90      # Angle for opening servo
 CLOSE_ANGLE = 0       # Angle for closing servo
 OPEN_TIME = 2         # Time to keep servo open in seconds
+DUTY_SLOPE = (MAX_DUTY - MIN_DUTY) / 180.0  # Duty cycle per degree, folded once
+
+# Capture Log Configuration
+# Fixed-size binary records: epoch timestamp, center x/y, area, detection flag.
+# The frame filename is derived from the timestamp, so it is not stored.
+# Use parse_log.py to convert a session log back to CSV.
+LOG_RECORD = struct.Struct('<diiiB')
+LOG_FLUSH_INTERVAL = 60  # Seconds between log flushes to the SD card
 
 def parse_args():
     """Parse command line arguments."""
@@ -103,6 +124,40 @@ def init_camera(exposure):
     
     raise RuntimeError("No working camera found! Tried all available backends.")
 
+def start_grab_thread(camera):
+    """Drain camera frames on a background thread into a 1-deep slot.
+
+    The main loop always consumes the newest frame instead of blocking on
+    the V4L2 read, so detection work overlaps with camera I/O. A deque with
+    maxlen=1 gives atomic latest-frame semantics without a lock.
+
+    The returned thread must be joined after clearing the event and before
+    releasing the camera - VideoCapture is not thread-safe, and releasing
+    while a read is in flight can crash.
+    """
+    frame_slot = deque(maxlen=1)
+    alive = threading.Event()
+    alive.set()
+
+    def _grab():
+        failures = 0
+        while alive.is_set():
+            ret, frame = camera.read()
+            if ret:
+                failures = 0
+                frame_slot.append(frame)
+            else:
+                # Back off on read failures instead of spinning a core the
+                # detection loop needs, and surface persistent trouble
+                failures += 1
+                if failures == 50:
+                    print("Error: camera reads keep failing - check the connection")
+                time.sleep(0.1)
+
+    thread = threading.Thread(target=_grab, daemon=True)
+    thread.start()
+    return frame_slot, alive, thread
+
 def init_servo():
     """Initialize the servo motor using lgpio"""
     try:
@@ -117,64 +172,153 @@ def init_servo():
         print(f"Failed to initialize servo: {str(e)}")
         return None
 
+_last_angle = None  # Last commanded angle, so repeated moves skip the syscall
+
 def move_servo(h, angle):
-    """Move servo to specified angle"""
-    duty_cycle = MIN_DUTY + (MAX_DUTY - MIN_DUTY) * angle / 180
-    lgpio.tx_pwm(h, GPIO_PIN, FREQ, duty_cycle)
-
-def save_image(frame, output_path):
-    """Save image with proper encoding to avoid libpng warnings."""
-    if len(frame.shape) == 3:  # Color image
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-    
+    """Move servo to specified angle, skipping writes when already there."""
+    global _last_angle
+    if angle == _last_angle:
+        return
+    _last_angle = angle
+    lgpio.tx_pwm(h, GPIO_PIN, FREQ, MIN_DUTY + DUTY_SLOPE * angle)
+
+def encode_image(frame):
+    """Encode frame as JPEG, returning the encoded buffer or None on failure."""
     is_success, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
-    if is_success:
-        with open(output_path, "wb") as f:
-            f.write(buffer)
-        return True
-    return False
-
-def detect_color(frame):
-    """Detect if target color is present in frame and return detection info."""
-    # Convert to HSV color space
-    hsv = cv2.cvtColor(frame, cv2.COLOR_RGB2HSV)
-    
-    # Create mask for target color
-    mask = cv2.inRange(hsv, HSV_MIN, HSV_MAX)
-    
-    # Find contours
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    # Find the largest contour within area bounds
-    max_area = 0
-    best_cnt = None
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if MIN_AREA <= area <= MAX_AREA and area > max_area:
-            max_area = area
-            best_cnt = cnt
-    
-    # If a valid contour was found
-    if best_cnt is not None:
-        # Calculate centroid
-        M = cv2.moments(best_cnt)
-        if M['m00'] != 0:
-            cx = int(M['m10'] / M['m00'])
-            cy = int(M['m01'] / M['m00'])
-            
-            # Draw detection on frame
-            cv2.drawContours(frame, [best_cnt], -1, (0, 255, 0), 2)
-            cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
-            cv2.putText(frame, f'Area: {int(max_area)}', (cx, cy - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-            
-            return (cx, cy, max_area)
-    
-    return None
+    return buffer if is_success else None
+
+def start_log_writer(log_path):
+    """Append packed log records from a queue on a background thread.
+
+    Keeps the log file open for the whole session instead of re-opening it
+    for every row, so the SD card sees coalesced block-sized writes rather
+    than one open/write/close round trip per capture. The buffer is flushed
+    once a minute rather than per record.
+    """
+    log_q = queue.Queue()
+
+    def _write():
+        with open(log_path, "ab", buffering=1 << 16) as log_file:
+            last_flush = time.time()
+            while True:
+                record = log_q.get()
+                if record is None:
+                    break
+                # A failed write (e.g. full SD card) must not kill the
+                # thread - later records may still fit, and dying here
+                # would silently drop everything queued behind them
+                try:
+                    log_file.write(record)
+                    if time.time() - last_flush >= LOG_FLUSH_INTERVAL:
+                        log_file.flush()
+                        last_flush = time.time()
+                except OSError as e:
+                    print(f"Error writing log record: {str(e)}")
+
+    thread = threading.Thread(target=_write, daemon=True)
+    thread.start()
+    return log_q, thread
+
+def start_image_writer():
+    """Write encoded JPEG buffers to disk from a queue on a background thread.
+
+    JPEG encoding stays on the main thread (CPU-bound); only the disk write
+    is deferred so the capture loop never waits on SD-card I/O.
+    """
+    image_q = queue.Queue()
+
+    def _write():
+        while True:
+            item = image_q.get()
+            if item is None:
+                break
+            buffer, output_path = item
+            # ndarray.tofile writes straight from the contiguous JPEG buffer,
+            # skipping the bytes copy an open()/write() pair would make; the
+            # write-then-rename keeps a mid-flight power cut from leaving a
+            # truncated JPEG under the final name. Failures (e.g. full SD
+            # card) are reported but must not kill the writer thread.
+            tmp_path = output_path + ".tmp"
+            try:
+                buffer.tofile(tmp_path)
+                os.replace(tmp_path, output_path)
+            except OSError as e:
+                print(f"Error saving {output_path}: {str(e)}")
+
+    thread = threading.Thread(target=_write, daemon=True)
+    thread.start()
+    return image_q, thread
+
+# Scratch buffers for the detection pipeline; the working size is fixed by
+# the camera config, so allocate once at import instead of three full-frame
+# allocations per captured frame
+_DETECT_SIZE = (FRAME_WIDTH // DETECT_SCALE, FRAME_HEIGHT // DETECT_SCALE)
+_small_buf = np.empty((_DETECT_SIZE[1], _DETECT_SIZE[0], 3), dtype=np.uint8)
+_hsv_buf = np.empty_like(_small_buf)
+_mask_buf = np.empty(_small_buf.shape[:2], dtype=np.uint8)
+
+def detect_color(frame, draw=True):
+    """Detect if target color is present in frame and return detection info.
+
+    With draw=False the annotation calls are skipped entirely - useful for
+    frames that are never written out, where the overlay would be wasted.
+    """
+    # Threshold at reduced resolution - every pass below touches 4x fewer
+    # bytes, and the area filter is loose enough that nothing is lost
+    small = cv2.resize(frame, _DETECT_SIZE, dst=_small_buf,
+                       interpolation=cv2.INTER_AREA)
+
+    # Convert to HSV and threshold (frames stay in OpenCV's native BGR order);
+    # with OpenCL both passes run on the GPU and only the mask comes back,
+    # since the component labeling below is CPU-only
+    if USE_OPENCL:
+        u_hsv = cv2.cvtColor(cv2.UMat(small), cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(u_hsv, HSV_MIN, HSV_MAX).get()
+    else:
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV, dst=_hsv_buf)
+        mask = cv2.inRange(hsv, HSV_MIN, HSV_MAX, dst=_mask_buf)
+
+    # Label connected blobs in one pass; stats carries area + bounding box,
+    # centroids the blob centers, so no contour iteration or moments needed
+    n_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(
+        mask, connectivity=8, ltype=cv2.CV_32S)
+    if n_labels <= 1:  # only background present
+        return None
+
+    # Vectorized area filter over all components (label 0 is background);
+    # thresholds scale by 1/DETECT_SCALE^2 to match the reduced resolution
+    scale_sq = DETECT_SCALE * DETECT_SCALE
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    valid = (areas >= MIN_AREA // scale_sq) & (areas <= MAX_AREA // scale_sq)
+    if not valid.any():
+        return None
+    best = int(np.where(valid, areas, 0).argmax()) + 1
+
+    # Scale results back to full-frame coordinates
+    max_area = int(stats[best, cv2.CC_STAT_AREA]) * scale_sq
+    cx = int(centroids[best][0]) * DETECT_SCALE
+    cy = int(centroids[best][1]) * DETECT_SCALE
+
+    if draw:
+        # Draw detection on frame (annotations end up in the saved images)
+        x, y, w, h = (int(stats[best, s]) * DETECT_SCALE for s in
+                      (cv2.CC_STAT_LEFT, cv2.CC_STAT_TOP,
+                       cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT))
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
+        cv2.putText(frame, f'Area: {max_area}', (cx, cy - 10),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+    return (cx, cy, max_area)
 
 def main():
     args = parse_args()
-    
+
+    # Keep OpenCV single-threaded: the half-res kernels are too small to
+    # amortize cross-core dispatch on a Pi, and this leaves the other cores
+    # free for the grab and writer threads
+    cv2.setNumThreads(1)
+
     # Convert duration to seconds
     total_duration = args.duration * 60
     
@@ -197,11 +341,13 @@ def main():
     session_dir = base_dir / timestamp
     session_dir.mkdir(exist_ok=True)
     
-    # Create log file in session directory
-    log_path = session_dir / "capture_log.csv"
-    with open(log_path, "w") as f:
-        f.write("timestamp,filepath,detection_found,center_x,center_y,area,servo_moved\n")
-    
+    # Create log file in session directory (binary records; see parse_log.py)
+    log_path = session_dir / "capture_log.bin"
+
+    # Background writers so the capture loop never blocks on SD-card I/O
+    log_q, log_thread = start_log_writer(log_path)
+    image_q, image_thread = start_image_writer()
+
     print(f"\nStarting capture session:")
     print(f"Duration: {args.duration} minutes")
     print(f"Interval: {args.interval} seconds")
@@ -209,10 +355,12 @@ def main():
     print(f"Output directory: {session_dir}")
     print(f"Saving {'only frames with detections' if args.detections_only else 'all frames'}\n")
     
+    # Capture frames on a dedicated thread; main loop consumes the newest one
+    frame_slot, grab_alive, grab_thread = start_grab_thread(camera)
+
     start_time = time.time()
     last_capture_time = start_time
     last_servo_move = start_time - SERVO_COOLDOWN  # Allow immediate first move
-    servo_at_min = True  # Track if servo is at min position
     frame_count = 0
     fps_time = start_time
     
@@ -221,24 +369,30 @@ def main():
             current_time = time.time()
             
             # Calculate and display FPS every second
-            frame_count += 1
             if current_time - fps_time >= 1.0:
                 fps = frame_count / (current_time - fps_time)
                 print(f"FPS: {fps:.2f}")
                 frame_count = 0
                 fps_time = current_time
-            
-            # Capture frame immediately without waiting
-            ret, frame = camera.read()
-            if not ret:
-                print("Failed to grab frame")
+
+            # Take the newest frame from the grab thread
+            try:
+                frame = frame_slot.pop()
+            except IndexError:
+                time.sleep(0.001)  # no new frame yet
                 continue
-            
-            # Swap red and blue channels for correct color
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
+
+            # Count only frames that actually get processed - the empty-pop
+            # spins above would otherwise inflate the FPS readout
+            frame_count += 1
+
+            # Decide up front whether this frame is due to be saved, so
+            # detection skips drawing annotations on frames that are
+            # never written out (most of them, at 1s intervals)
+            save_due = (current_time - last_capture_time) >= args.interval
+
             # Process the frame
-            detection_info = detect_color(frame)
+            detection_info = detect_color(frame, draw=save_due)
             detection_found = detection_info is not None
             
             # Handle servo control based on detection
@@ -252,32 +406,44 @@ def main():
                     move_servo(h, CLOSE_ANGLE)
             
             # Save frame if needed (based on interval)
-            if (current_time - last_capture_time) >= args.interval:
+            if save_due:
                 timestamp = datetime.datetime.now()
                 filename = f"frame_{timestamp.strftime('%Y%m%d_%H%M%S')}.jpg"
                 filepath = session_dir / filename
                 
                 if not args.detections_only or detection_found:
-                    if save_image(frame, str(filepath)):
+                    buffer = encode_image(frame)
+                    if buffer is not None:
+                        image_q.put((buffer, str(filepath)))
                         print(f"Saved frame to {filepath}")
-                        
+
                         # Log the capture with servo movement info
-                        with open(log_path, "a") as f:
-                            if detection_found:
-                                cx, cy, area = detection_info
-                                f.write(f"{timestamp.isoformat()},{filepath},True,{cx},{cy},{area},True\n")
-                            else:
-                                f.write(f"{timestamp.isoformat()},{filepath},False,,,,False\n")
-                
+                        if detection_found:
+                            cx, cy, area = detection_info
+                            log_q.put(LOG_RECORD.pack(timestamp.timestamp(), cx, cy, area, 1))
+                        else:
+                            log_q.put(LOG_RECORD.pack(timestamp.timestamp(), 0, 0, 0, 0))
+
                 last_capture_time = current_time
-            
-            # Small sleep to prevent CPU overload, but much shorter than before
-            time.sleep(0.01)  # 10ms delay instead of 100ms
-            
+
     except KeyboardInterrupt:
         print("\nStopping capture")
     finally:
-        # Cleanup
+        # Cleanup - flush pending writes before tearing anything down
+        log_q.put(None)
+        image_q.put(None)
+        log_thread.join()
+        image_thread.join()
+        # The sentinels are queued last, so anything still here means a
+        # writer thread died - say so instead of discarding data silently
+        if not log_q.empty():
+            print(f"Warning: {log_q.qsize()} log records were not written")
+        if not image_q.empty():
+            print(f"Warning: {image_q.qsize()} images were not written")
+        # Let the in-flight camera.read() return before releasing - a
+        # concurrent read/release can crash and skip the servo shutdown below
+        grab_alive.clear()
+        grab_thread.join(timeout=2.0)
         camera.release()
         if h is not None:
             move_servo(h, CLOSE_ANGLE)  # Return to min position
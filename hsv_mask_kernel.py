@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""
+Fused BGR->HSV Threshold Kernel
+
+Single-pass alternative to cv2.cvtColor(BGR2HSV) followed by cv2.inRange:
+each pixel is converted and range-checked in one traversal, so the full-size
+HSV intermediate is never written to memory. The row loop is parallelized
+and auto-vectorized by Numba/LLVM.
+
+Two specializations are compiled - one for a plain hue band and one for a
+band wrapping the 0/180 seam (reds) - so the inner loop carries only the
+predicate it actually needs; bgr_to_hsv_mask picks the right one per call.
+
+Numba is optional (the deployed Pi image does not ship it); callers must
+check HAVE_NUMBA and fall back to the two-pass OpenCV path otherwise.
+
+The conversion follows OpenCV's 8-bit HSV convention (H in [0,179], S and V
+in [0,255]) using integer arithmetic; values can differ from cv2.cvtColor by
+at most one unit of rounding.
+
+Author: Henry Tsai
+Created: 2024-12-21
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+
+if HAVE_NUMBA:
+    @njit(inline='always')
+    def _pixel_hsv(b, g, r):
+        """Convert one 8-bit BGR pixel to OpenCV-convention integer HSV."""
+        v = max(b, g, r)
+        diff = v - min(b, g, r)
+        s = (255 * diff) // v if v > 0 else 0
+
+        if diff == 0:
+            h = 0
+        else:
+            if v == r:
+                h = 60 * (g - b) // diff
+            elif v == g:
+                h = 120 + 60 * (b - r) // diff
+            else:
+                h = 240 + 60 * (r - g) // diff
+            if h < 0:
+                h += 360
+            h //= 2  # OpenCV stores hue halved to fit uint8
+        return h, s, v
+
+    @njit(parallel=True, fastmath=True, boundscheck=False, cache=True)
+    def _mask_band(bgr, h_lo, s_lo, v_lo, h_hi, s_hi, v_hi, mask):
+        height, width = bgr.shape[0], bgr.shape[1]
+        for row in prange(height):
+            for col in range(width):
+                h, s, v = _pixel_hsv(np.int32(bgr[row, col, 0]),
+                                     np.int32(bgr[row, col, 1]),
+                                     np.int32(bgr[row, col, 2]))
+                if (h_lo <= h <= h_hi and s_lo <= s <= s_hi
+                        and v_lo <= v <= v_hi):
+                    mask[row, col] = 255
+                else:
+                    mask[row, col] = 0
+
+    @njit(parallel=True, fastmath=True, boundscheck=False, cache=True)
+    def _mask_wrap(bgr, h_lo, s_lo, v_lo, h_hi, s_hi, v_hi, mask):
+        height, width = bgr.shape[0], bgr.shape[1]
+        for row in prange(height):
+            for col in range(width):
+                h, s, v = _pixel_hsv(np.int32(bgr[row, col, 0]),
+                                     np.int32(bgr[row, col, 1]),
+                                     np.int32(bgr[row, col, 2]))
+                if ((h >= h_lo or h <= h_hi) and s_lo <= s <= s_hi
+                        and v_lo <= v <= v_hi):
+                    mask[row, col] = 255
+                else:
+                    mask[row, col] = 0
+
+    def bgr_to_hsv_mask(bgr, h_lo, s_lo, v_lo, h_hi, s_hi, v_hi, mask):
+        """Write the in-range mask (0/255) for a BGR image in one pass.
+
+        h_lo > h_hi selects the wraparound kernel for hue bands crossing
+        the 0/180 seam.
+        """
+        if h_lo <= h_hi:
+            _mask_band(bgr, h_lo, s_lo, v_lo, h_hi, s_hi, v_hi, mask)
+        else:
+            _mask_wrap(bgr, h_lo, s_lo, v_lo, h_hi, s_hi, v_hi, mask)
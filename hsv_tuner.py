@@ -46,6 +46,8 @@ Interactive Controls:
         s: Save current configuration to file
         l: Load configuration from file
         r: Reset trackbars to default values
+        f: Toggle half/full resolution processing
+        w: Save current frame, mask, and result as PNG
         ESC: Alternative way to exit
         
         Image Directory Mode Only:
@@ -96,10 +98,35 @@ import os
 import time
 import signal
 import atexit
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import hsv_mask_kernel
+
+# libjpeg-turbo decodes 2-4x faster than OpenCV's default JPEG path and can
+# scale during decode; optional (like numba) - photo mode falls back to
+# cv2.imread when the package or its native library is missing
+try:
+    from turbojpeg import TurboJPEG
+    _turbojpeg = TurboJPEG()
+except Exception:
+    _turbojpeg = None
 
 # Configuration Constants
 WINDOW_NAMES = ['Original', 'Mask', 'Result']
 
+# Offload HSV conversion + threshold to OpenCL (UMat) when the platform has it
+USE_OPENCL = cv2.ocl.haveOpenCL()
+if USE_OPENCL:
+    cv2.ocl.setUseOpenCL(True)
+
+# Make sure OpenCV's SIMD fast paths are enabled and size its worker pool to
+# leave one core free for the GUI and capture threads (on the 4-core Pi the
+# default pool oversubscribes and thrashes)
+cv2.setUseOptimized(True)
+cv2.setNumThreads(max(1, (os.cpu_count() or 1) - 1))
+
 # Camera Configuration
 CAMERA_WIDTH = 640  # Optimized resolution for Raspberry Pi
 CAMERA_HEIGHT = 480
@@ -119,25 +146,87 @@ HSV_PARAMS = [
 
 # File Configuration
 CONFIG_FILE = 'hsv_tuner_config.json'
+LOG_FILE = 'hsv_values_log.txt'
+
+# Photo-mode cache: keep a handful of decoded frames around and prefetch the
+# neighbours of the current photo so 'n'/'b' navigation is instant
+PHOTO_CACHE_SIZE = 8
+PREFETCH_SPAN = 3
+
+# Default preview downsampling factor ('f' toggles full resolution)
+PREVIEW_SCALE = 2
 
 class HSVTuner:
-    def __init__(self, photo_dir=None, output_dir=None):
+    def __init__(self, photo_dir=None, output_dir=None, use_cuda=False):
         self.photo_dir = Path(photo_dir) if photo_dir else None
         self.output_dir = Path(output_dir) if output_dir else None
         self.current_index = 0
         self.use_camera = photo_dir is None
 
+        # Optional CUDA offload for desktop tuning sessions; the deployed Pi
+        # has no CUDA device so this stays opt-in via --cuda
+        self.use_cuda = False
+        if use_cuda:
+            try:
+                self.use_cuda = cv2.cuda.getCudaEnabledDeviceCount() > 0
+            except cv2.error:
+                pass
+            if not self.use_cuda:
+                print("CUDA requested but no CUDA device found, using CPU")
+
+        # Monotonic frame counter - bumped whenever a genuinely new frame
+        # appears, so the pipeline caches can key on it safely
+        self._frame_seq = 0
+
+        # Process at reduced resolution by default; 'f' switches to full res
+        self.preview_scale = PREVIEW_SCALE
+
         # Initialize camera or load photos
         if self.use_camera:
-            self.cap = cv2.VideoCapture(0, cv2.CAP_V4L2)  # Use V4L2 backend for better performance
+            # Prefer a GStreamer pipeline: drop=true max-buffers=1 enforces
+            # newest-frame delivery inside the pipeline itself, rather than
+            # relying on the V4L2 BUFFERSIZE hint that some drivers ignore
+            pipeline = (
+                f"v4l2src device=/dev/video0 ! "
+                f"image/jpeg,width={CAMERA_WIDTH},height={CAMERA_HEIGHT},"
+                f"framerate={CAMERA_FPS}/1 ! jpegdec ! videoconvert ! "
+                f"appsink drop=true max-buffers=1 sync=false"
+            )
+            self.cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
             if not self.cap.isOpened():
-                print("Error: Could not open camera")
+                # Builds without GStreamer fall back to plain V4L2
+                self.cap = cv2.VideoCapture(0, cv2.CAP_V4L2)
+                if not self.cap.isOpened():
+                    print("Error: Could not open camera")
+                    sys.exit(1)
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
+                self.cap.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
+                # MJPG keeps USB cameras at full FPS (raw YUY2 hits USB
+                # bandwidth caps); a 1-frame driver buffer stops stale
+                # frames queueing up
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+            # Capture on a background thread into a 1-deep slot so the GUI
+            # loop always sees the newest frame instead of blocking on V4L2
+            self._camera_frame = None
+            self._frame_slot = deque(maxlen=1)
+            self._capture_alive = threading.Event()
+            self._capture_alive.set()
+            self._capture_thread = threading.Thread(target=self._capture_loop,
+                                                    daemon=True)
+            self._capture_thread.start()
+
+            # Wait for the first frame so show_images never starts empty
+            deadline = time.time() + 5.0
+            while not self._frame_slot and time.time() < deadline:
+                time.sleep(0.01)
+            if not self._frame_slot:
+                print("Error: Could not read from camera")
                 sys.exit(1)
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
-            self.cap.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
         else:
-            self.photo_files = sorted([f for f in self.photo_dir.iterdir() if f.suffix.lower() in {'.jpg', '.jpeg', '.png', '.bmp'}])
+            self.photo_files = self._list_photos()
             if not self.photo_files:
                 print("No photos found in directory!")
                 sys.exit(1)
@@ -148,29 +237,143 @@ class HSVTuner:
         # Load saved HSV configuration
         self.hsv_values = self.load_config()
 
+        # Reusable HSV bound buffers - mutated in place each frame so
+        # cv2.inRange never has to coerce freshly built Python tuples
+        self._hsv_lo = np.empty(3, dtype=np.uint8)
+        self._hsv_hi = np.empty(3, dtype=np.uint8)
+
+        # Staged pipeline caches: each stage recomputes only when its own
+        # input changed (frame -> HSV -> mask -> contours), so dragging the
+        # area sliders no longer re-runs colour conversion and thresholding
+        self._hsv = None
+        self._hsv_frame_id = None
+        self._mask = None
+        self._mask_bounds = None
+        self._stats = None
+        self._result = None
+
         # Register cleanup handlers
+        self._cleaned = False
         atexit.register(self.cleanup)
         signal.signal(signal.SIGINT, self.signal_handler)
 
-        # Create trackbars with loaded or default values
+        # Create trackbars with loaded or default values; the callbacks push
+        # changed values into _params so the GUI loop never has to poll
+        # getTrackbarPos eight times per tick
+        self._params = {}
+        self._params_dirty = False
+        self._last_save_t = 0.0
         for name, default, max_val in HSV_PARAMS:
             value = self.hsv_values.get(name, default)
-            cv2.createTrackbar(name, 'Controls', value, max_val, lambda x: None)
+            self._params[name] = value
+            cv2.createTrackbar(name, 'Controls', value, max_val, self._make_trackbar_cb(name))
 
         # Pre-load current frame (if using photos) to reduce lag
         self.current_frame = None
         if not self.use_camera:
+            self._photo_cache = OrderedDict()  # index -> decoded frame
+            self._cache_lock = threading.Lock()
+            self._prefetch_pending = set()
+            self._prefetch_pool = ThreadPoolExecutor(max_workers=2)
+            self._decode_factor = None  # chosen on the first decode
             self.current_frame = self.load_current_photo()
 
+    def _list_photos(self):
+        """Return the sorted photo paths, with a sidecar cache for rescans.
+
+        The list is persisted next to the photos keyed on the directory
+        mtime, so relaunching the tuner on a large flight-footage directory
+        skips the scan entirely unless files were added or removed.
+        """
+        cache_path = self.photo_dir / '.hsv_tuner_cache.txt'
+        try:
+            cached = cache_path.read_text().splitlines()
+            if cached and cached[0] == str(os.stat(self.photo_dir).st_mtime_ns):
+                # Entries are basenames, so the cache stays valid no matter
+                # what working directory or path spelling launched the tuner
+                return [str(self.photo_dir / name) for name in cached[1:]]
+        except OSError:
+            pass
+
+        # scandir returns plain dirent names in batches - no Path object
+        # or per-entry stat overhead on large photo directories (is_file
+        # reads the cached dirent type, and keeps out directories or
+        # symlinks that happen to end in .jpg)
+        with os.scandir(self.photo_dir) as entries:
+            photo_names = sorted(
+                entry.name for entry in entries
+                if entry.is_file(follow_symlinks=False)
+                and entry.name.rpartition('.')[2].lower() in {'jpg', 'jpeg', 'png', 'bmp'})
+
+        try:
+            # Create the cache file first: that bumps the directory mtime, so
+            # sample it afterwards or the cache would never validate
+            cache_path.write_text('')
+            dir_mtime = str(os.stat(self.photo_dir).st_mtime_ns)
+            cache_path.write_text('\n'.join([dir_mtime] + photo_names))
+        except OSError:
+            pass  # read-only photo directory; just skip caching
+
+        return [str(self.photo_dir / name) for name in photo_names]
+
+    def _make_trackbar_cb(self, name):
+        def _on_change(value):
+            self._params[name] = value
+            self._params_dirty = True
+        return _on_change
+
     def signal_handler(self, sig, frame):
         print("\nSaving values and exiting...")
         self.cleanup()
         sys.exit(0)
 
+    def write_log(self):
+        """Append the tuned values to the session log in a single syscall.
+
+        The whole entry (plus the header on a fresh file) is built as one
+        payload and written through one os.write on an O_APPEND descriptor,
+        so shutdown is not delayed by a series of buffered text writes.
+        """
+        p = self._params
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        entry = (
+            f"\n# {timestamp}\n"
+            f"HSV_MIN = np.array([{p['H min']}, {p['S min']}, {p['V min']}], dtype=np.uint8)    # Lower bound of target color\n"
+            f"HSV_MAX = np.array([{p['H max']}, {p['S max']}, {p['V max']}], dtype=np.uint8)  # Upper bound of target color\n"
+            f"MIN_AREA = {p['Area min']}    # Minimum area to consider a valid detection\n"
+            f"MAX_AREA = {p['Area max']}  # Maximum area to consider a valid detection\n"
+            f"#{'-' * 80}\n"
+        )
+        try:
+            fd = os.open(LOG_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                if os.fstat(fd).st_size == 0:
+                    entry = ("# HSV Tuner Log\n"
+                             "# Format: timestamp, HSV_MIN, HSV_MAX, MIN_AREA, MAX_AREA\n\n"
+                             + entry)
+                os.write(fd, entry.encode())
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Error writing log: {e}")
+
     def cleanup(self):
+        # Runs both explicitly (show_images / signal_handler) and via the
+        # atexit hook; guard so the appending write_log doesn't record the
+        # session twice
+        if self._cleaned:
+            return
+        self._cleaned = True
+        self.write_log()
         self.save_config()
         if self.use_camera:
+            # Let the in-flight cap.read() return before releasing;
+            # VideoCapture is not safe against a concurrent read/release
+            self._capture_alive.clear()
+            self._capture_thread.join(timeout=2.0)
             self.cap.release()
+        else:
+            self._prefetch_pool.shutdown(wait=False)
         cv2.destroyAllWindows()
 
     def load_config(self):
@@ -193,76 +396,347 @@ class HSVTuner:
         # Return defaults if loading fails
         return {name: default for name, default, _ in HSV_PARAMS}
 
-    def save_config(self):
+    def save_config(self, verbose=True):
         try:
-            hsv_values = {}
-            for name, _, max_val in HSV_PARAMS:
-                value = cv2.getTrackbarPos(name, 'Controls')
-                if 0 <= value <= max_val:  # Validate before saving
-                    hsv_values[name] = value
-                else:
-                    print(f"Warning: Invalid value for {name}: {value}")
-            
+            # The trackbar callbacks keep _params authoritative, so dump it
+            # directly instead of polling getTrackbarPos per slider
             with open(CONFIG_FILE, 'w') as f:
-                json.dump(hsv_values, f, indent=4)
-            print(f"Saved HSV values to {CONFIG_FILE}")
+                json.dump(self._params, f, indent=4)
+            if verbose:
+                print(f"Saved HSV values to {CONFIG_FILE}")
         except Exception as e:
             print(f"Error saving config: {e}")
 
+    def save_outputs(self, frame, mask, result):
+        """Write the current frame, mask, and overlay to the output dir.
+
+        PNG at compression level 1 skips the JPEG DCT/Huffman work and a
+        deep optimization pass, so the save barely stalls the GUI loop;
+        the mask is written bilevel (1 bit/pixel) and stays lossless.
+        """
+        out_dir = self.output_dir if self.output_dir else Path('.')
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        cv2.imwrite(str(out_dir / f"frame_{stamp}.png"), frame,
+                    [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        cv2.imwrite(str(out_dir / f"mask_{stamp}.png"), mask,
+                    [cv2.IMWRITE_PNG_BILEVEL, 1])
+        cv2.imwrite(str(out_dir / f"result_{stamp}.png"), result,
+                    [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        print(f"Saved frame/mask/result *_{stamp}.png to {out_dir}")
+
+    REDUCED_DECODE_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2,
+                            4: cv2.IMREAD_REDUCED_COLOR_4,
+                            8: cv2.IMREAD_REDUCED_COLOR_8}
+
+    def _imread(self, path, factor):
+        """Decode path at 1/factor scale, via libjpeg-turbo when available."""
+        if _turbojpeg is not None and path.lower().endswith(('.jpg', '.jpeg')):
+            try:
+                with open(path, 'rb') as f:
+                    return _turbojpeg.decode(f.read(), scaling_factor=(1, factor))
+            except (OSError, IOError):
+                pass  # unreadable or malformed JPEG; let OpenCV try
+        if factor == 1:
+            return cv2.imread(path)
+        return cv2.imread(path, self.REDUCED_DECODE_FLAGS[factor])
+
+    def _decode_photo(self, index):
+        """Decode the photo at index, bypassing the cache."""
+        path = self.photo_files[index]
+        if self._decode_factor is None:
+            img = self._imread(path, 1)
+            if img is None:
+                print(f"Error: Could not load image {path}")
+                return None
+            # JPEGs decode up to ~8x faster at a power-of-two DCT reduction
+            # (the high-frequency coefficients are never computed). Probe
+            # the first photo and pick the strongest factor that keeps at
+            # least the camera working width - flight captures at 640px
+            # stay full size, so tuned area values still transfer; only
+            # oversized DSLR-class images get reduced.
+            width = img.shape[1]
+            self._decode_factor = 1
+            for factor in (8, 4, 2):
+                if width // factor >= CAMERA_WIDTH:
+                    self._decode_factor = factor
+                    break
+            if self._decode_factor == 1:
+                return img
+        img = self._imread(path, self._decode_factor)
+        if img is None:
+            print(f"Error: Could not load image {path}")
+        return img
+
+    def _cache_photo(self, index, img):
+        with self._cache_lock:
+            self._photo_cache[index] = img
+            self._photo_cache.move_to_end(index)
+            while len(self._photo_cache) > PHOTO_CACHE_SIZE:
+                self._photo_cache.popitem(last=False)
+
+    def _prefetch_neighbours(self):
+        """Queue decodes of the photos around the current one.
+
+        cv2.imread releases the GIL during decode, so the pool's two workers
+        overlap neighbouring decodes with the GUI loop (and with each
+        other); by the time the user presses 'n' or 'b' the frame is usually
+        already in the cache.
+        """
+        base = self.current_index
+        count = len(self.photo_files)
+        for offset in range(1, PREFETCH_SPAN + 1):
+            for index in ((base + offset) % count, (base - offset) % count):
+                with self._cache_lock:
+                    if index in self._photo_cache or index in self._prefetch_pending:
+                        continue
+                    self._prefetch_pending.add(index)
+                self._prefetch_pool.submit(self._prefetch_one, index)
+
+    def _prefetch_one(self, index):
+        if hasattr(os, 'posix_fadvise'):
+            # Ask the kernel to start pulling the file into page cache now,
+            # so the decode below stalls on disk less (matters most on slow
+            # SD cards and network mounts); length 0 means the whole file
+            try:
+                fd = os.open(self.photo_files[index], os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass
+        img = self._decode_photo(index)
+        if img is not None:
+            self._cache_photo(index, img)
+        with self._cache_lock:
+            self._prefetch_pending.discard(index)
+
     def load_current_photo(self):
         if 0 <= self.current_index < len(self.photo_files):
-            img = cv2.imread(str(self.photo_files[self.current_index]))
+            index = self.current_index
+            with self._cache_lock:
+                img = self._photo_cache.get(index)
+                if img is not None:
+                    self._photo_cache.move_to_end(index)
             if img is None:
-                print(f"Error: Could not load image {self.photo_files[self.current_index]}")
-                return None
-            return cv2.GaussianBlur(img, (5, 5), 0)  # Apply Gaussian blur for smoother mask
+                img = self._decode_photo(index)
+                if img is not None:
+                    self._cache_photo(index, img)
+            self._prefetch_neighbours()  # warm the cache for the next keypress
+            self._frame_seq += 1
+            return img
         return None
 
+    def _capture_loop(self):
+        failures = 0
+        while self._capture_alive.is_set():
+            ret, frame = self.cap.read()
+            if ret:
+                failures = 0
+                self._frame_slot.append(frame)
+            else:
+                # Camera unplugged or driver stall: back off instead of
+                # spinning a full core, and tell the user once it looks
+                # persistent (the GUI keeps showing the last good frame)
+                failures += 1
+                if failures == 50:
+                    print("Error: camera reads keep failing - check the connection")
+                time.sleep(0.1)
+
     def get_frame(self):
         if self.use_camera:
-            ret, frame = self.cap.read()
-            if not ret:
-                print("Error: Could not read from camera")
-                return None
-            return cv2.GaussianBlur(frame, (5, 5), 0)  # Apply Gaussian blur for smoother mask
+            try:
+                frame = self._frame_slot.pop()
+            except IndexError:
+                return self._camera_frame  # no new frame yet; reuse the last one
+            self._camera_frame = frame
+            self._frame_seq += 1
+            return self._camera_frame
         else:
             return self.current_frame
 
     def process_frame(self, frame, hsv_params):
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        mask = cv2.inRange(hsv, (hsv_params['H min'], hsv_params['S min'], hsv_params['V min']),
-                           (hsv_params['H max'], hsv_params['S max'], hsv_params['V max']))
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        result = frame.copy()
-        for cnt in contours:
-            area = cv2.contourArea(cnt)
-            if hsv_params['Area min'] <= area <= hsv_params['Area max']:
-                x, y, w, h = cv2.boundingRect(cnt)
-                cv2.rectangle(result, (x, y), (x + w, y + h), (255, 0, 0), 2)
+        bounds = (hsv_params['H min'], hsv_params['S min'], hsv_params['V min'],
+                  hsv_params['H max'], hsv_params['S max'], hsv_params['V max'])
+
+        # Threshold and search for contours at reduced resolution ('f'
+        # toggles full-res); rectangles are scaled back up before drawing,
+        # so the overlay looks the same while pixel work drops by scale^2
+        scale = self.preview_scale
+        if scale > 1:
+            work = cv2.resize(frame, (frame.shape[1] // scale, frame.shape[0] // scale),
+                              interpolation=cv2.INTER_AREA)
+        else:
+            work = frame
+
+        # Camera frames are new nearly every tick, so the HSV-stage cache
+        # rarely hits there; when Numba is available, use the fused
+        # single-pass kernel instead of materializing the HSV intermediate
+        # at all. Photo mode keeps the staged caches - re-thresholding a
+        # cached HSV image is cheaper than re-converting while dragging
+        # sliders.
+        if hsv_mask_kernel.HAVE_NUMBA and self.use_camera and not (self.use_cuda or USE_OPENCL):
+            if self._hsv_frame_id != self._frame_seq or self._mask_bounds != bounds:
+                if self._mask is None or self._mask.shape != work.shape[:2]:
+                    self._mask = np.empty(work.shape[:2], dtype=np.uint8)
+                hsv_mask_kernel.bgr_to_hsv_mask(work, bounds[0], bounds[1], bounds[2],
+                                                bounds[3], bounds[4], bounds[5], self._mask)
+                self._mask = cv2.medianBlur(self._mask, 3)
+                self._hsv_frame_id = self._frame_seq
+                self._mask_bounds = bounds
+                self._stats = None
+
+        # Stage 1: colour conversion, only when the frame itself changed
+        elif self._hsv_frame_id != self._frame_seq:
+            if self.use_cuda:
+                gpu = cv2.cuda_GpuMat()
+                gpu.upload(work)
+                self._hsv = cv2.cuda.cvtColor(gpu, cv2.COLOR_BGR2HSV)
+            elif USE_OPENCL:
+                self._hsv = cv2.cvtColor(cv2.UMat(work), cv2.COLOR_BGR2HSV)
+            else:
+                # Convert into a persistent HSV buffer rather than letting
+                # cvtColor allocate a new one each time
+                if (not isinstance(self._hsv, np.ndarray)
+                        or self._hsv.shape[:2] != work.shape[:2]):
+                    self._hsv = np.empty(work.shape[:2] + (3,), dtype=np.uint8)
+                cv2.cvtColor(work, cv2.COLOR_BGR2HSV, dst=self._hsv)
+            self._hsv_frame_id = self._frame_seq
+            self._mask_bounds = None  # downstream caches are now stale
+
+        # Stage 2: threshold, only when the HSV bounds (or the frame) changed;
+        # only the mask comes back from the GPU since findContours is CPU-only
+        if self._mask_bounds != bounds:
+            self._hsv_lo[:] = bounds[:3]
+            self._hsv_hi[:] = bounds[3:]
+            if bounds[0] > bounds[3]:
+                # H min above H max means the hue band straddles the 0/180
+                # seam (reds); inRange can't wrap, so threshold [H min, 179]
+                # and [0, H max] separately and OR the halves
+                seam_hi = np.array([179, bounds[4], bounds[5]], dtype=np.uint8)
+                seam_lo = np.array([0, bounds[1], bounds[2]], dtype=np.uint8)
+                if self.use_cuda:
+                    upper = cv2.cuda.inRange(self._hsv, tuple(self._hsv_lo.tolist()),
+                                             tuple(seam_hi.tolist())).download()
+                    lower = cv2.cuda.inRange(self._hsv, tuple(seam_lo.tolist()),
+                                             tuple(self._hsv_hi.tolist())).download()
+                elif USE_OPENCL:
+                    upper = cv2.inRange(self._hsv, self._hsv_lo, seam_hi).get()
+                    lower = cv2.inRange(self._hsv, seam_lo, self._hsv_hi).get()
+                else:
+                    upper = cv2.inRange(self._hsv, self._hsv_lo, seam_hi)
+                    lower = cv2.inRange(self._hsv, seam_lo, self._hsv_hi)
+                self._mask = cv2.bitwise_or(upper, lower, dst=upper)
+            elif self.use_cuda:
+                self._mask = cv2.cuda.inRange(self._hsv, tuple(self._hsv_lo.tolist()),
+                                              tuple(self._hsv_hi.tolist())).download()
+            elif USE_OPENCL:
+                self._mask = cv2.inRange(self._hsv, self._hsv_lo, self._hsv_hi).get()
+            else:
+                # Write into the persistent mask buffer instead of letting
+                # inRange allocate a fresh one per threshold change
+                if self._mask is None or self._mask.shape != self._hsv.shape[:2]:
+                    self._mask = np.empty(self._hsv.shape[:2], dtype=np.uint8)
+                cv2.inRange(self._hsv, self._hsv_lo, self._hsv_hi, dst=self._mask)
+            # Despeckle the binary mask instead of blurring the source frame:
+            # a 3x3 median over one channel is far cheaper than a 5x5
+            # Gaussian over three, and it acts where the noise actually
+            # shows up - isolated mask pixels
+            self._mask = cv2.medianBlur(self._mask, 3)
+            self._mask_bounds = bounds
+            self._stats = None
+
+        # Stage 3: connected components, only when the mask changed; one
+        # raster pass yields bounding boxes plus pixel-exact areas (the same
+        # measure flight_detection_servo filters on), replacing the
+        # findContours + per-contour contourArea/boundingRect round trips
+        if self._stats is None:
+            _, _, self._stats, _ = cv2.connectedComponentsWithStats(
+                self._mask, connectivity=8, ltype=cv2.CV_32S)
+
+        # Row 0 of the stats table is the background component
+        keep_idx = ()
+        if len(self._stats) > 1:
+            # Areas measured on the reduced mask are scale^2 smaller, so
+            # shrink the slider thresholds to match
+            scale_sq = scale * scale
+            areas = self._stats[1:, cv2.CC_STAT_AREA]
+            keep = ((areas >= hsv_params['Area min'] / scale_sq)
+                    & (areas <= hsv_params['Area max'] / scale_sq))
+            keep_idx = np.nonzero(keep)[0] + 1
+
+        if len(keep_idx) == 0:
+            # Nothing to draw - show the frame itself rather than copying it
+            result = frame
+        else:
+            # Draw on a persistent scratch canvas; np.copyto refreshes it in
+            # place instead of allocating a new full-frame copy per tick
+            if self._result is None or self._result.shape != frame.shape:
+                self._result = np.empty_like(frame)
+            np.copyto(self._result, frame)
+            result = self._result
+            for i in keep_idx:
+                x, y, w, h = self._stats[i, :4]
+                cv2.rectangle(result, (x * scale, y * scale),
+                              ((x + w) * scale, (y + h) * scale), (255, 0, 0), 2)
+
+        if scale > 1:
+            # Upscale the mask for display so all windows stay the same size
+            mask = cv2.resize(self._mask, (frame.shape[1], frame.shape[0]),
+                              interpolation=cv2.INTER_NEAREST)
+        else:
+            mask = self._mask
 
         return mask, result
 
     def show_images(self):
+        last_key = None
+        mask = result = None
         while True:
             frame = self.get_frame()
             if frame is None:
                 break
 
-            # Get HSV parameters from trackbars
-            hsv_params = {name: cv2.getTrackbarPos(name, 'Controls') for name, _, _ in HSV_PARAMS}
-
-            # Process frame
-            mask, result = self.process_frame(frame, hsv_params)
-
-            # Display images
-            cv2.imshow('Original', frame)
-            cv2.imshow('Mask', mask)
-            cv2.imshow('Result', result)
-
-            key = cv2.waitKey(1) & 0xFF
+            # Trackbar callbacks keep _params current, so reading it here is
+            # free; eight getTrackbarPos round trips per tick are gone
+            hsv_params = self._params
+
+            # Re-run the pipeline only when a slider moved or a genuinely new
+            # frame arrived (tracked by the frame sequence counter); the loop
+            # otherwise reprocesses identical input on every tick
+            process_key = (self._frame_seq, tuple(hsv_params.values()))
+            if process_key != last_key:
+                mask, result = self.process_frame(frame, hsv_params)
+                last_key = process_key
+                # Push to the windows only on recompute; imshow uploads a
+                # full frame per call, and idle ticks have nothing new to
+                # show (waitKey below still pumps the GUI event loop)
+                cv2.imshow('Original', frame)
+                cv2.imshow('Mask', mask)
+                cv2.imshow('Result', result)
+
+            # Autosave moved sliders at most once a second, so a crash
+            # mid-session loses at most a second of tuning and dragging a
+            # slider never hammers the SD card
+            if self._params_dirty and time.monotonic() - self._last_save_t > 1.0:
+                self.save_config(verbose=False)
+                self._last_save_t = time.monotonic()
+                self._params_dirty = False
+
+            # 15ms wait (~60 FPS ceiling) - waitKey(1) spins a full core on
+            # Linux even when nothing is happening
+            key = cv2.waitKey(15) & 0xFF
             if key == ord('q'):
                 break
+            elif key == ord('f'):
+                # Toggle between half-res preview and full-res processing
+                self.preview_scale = 1 if self.preview_scale > 1 else PREVIEW_SCALE
+                self._hsv_frame_id = None  # caches were built at the old scale
+                self._mask_bounds = None
+                last_key = None
+            elif key == ord('w'):
+                self.save_outputs(frame, mask, result)
             elif not self.use_camera:
                 if key == ord('n'):
                     self.current_index = (self.current_index + 1) % len(self.photo_files)
@@ -277,13 +751,15 @@ def main():
     parser = argparse.ArgumentParser(description='HSV Tuner for Raspberry Pi')
     parser.add_argument('photo_dir', nargs='?', help='Directory containing photos to view')
     parser.add_argument('-o', '--output', help='Output directory for results')
+    parser.add_argument('--cuda', action='store_true',
+                        help='Offload HSV thresholding to CUDA when available')
     args = parser.parse_args()
 
     if args.photo_dir and not Path(args.photo_dir).is_dir():
         print(f"Error: {args.photo_dir} is not a valid directory")
         sys.exit(1)
 
-    tuner = HSVTuner(args.photo_dir, args.output)
+    tuner = HSVTuner(args.photo_dir, args.output, use_cuda=args.cuda)
     tuner.show_images()
 
 if __name__ == "__main__":
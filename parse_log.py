@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""
+Flight Capture Log Parser
+
+Converts the binary capture log written by flight_detection_servo.py back
+into the original CSV format. Each record stores the capture timestamp,
+detection center, area, and whether the servo was triggered; the frame
+filename is reconstructed from the timestamp.
+
+Usage:
+    python3 parse_log.py <session_dir>/capture_log.bin
+
+Author: Henry Tsai
+Created: 2024-12-21
+"""
+
+import argparse
+import datetime
+import struct
+import sys
+from pathlib import Path
+
+# Must match LOG_RECORD in flight_detection_servo.py
+LOG_RECORD = struct.Struct('<diiiB')
+
+
+def parse_log(log_path):
+    """Yield (timestamp, filepath, detection_found, cx, cy, area) tuples."""
+    session_dir = Path(log_path).parent
+    with open(log_path, "rb") as f:
+        data = f.read()
+    # A crash or power cut mid-flight can leave a partial record at the end
+    # (the writer buffers 64 KiB and flushes once a minute); trim to whole
+    # records so the complete ones still parse
+    tail = len(data) % LOG_RECORD.size
+    if tail:
+        print(f"Warning: dropping {tail} trailing bytes (partial record)",
+              file=sys.stderr)
+        data = data[:len(data) - tail]
+    for epoch, cx, cy, area, found in LOG_RECORD.iter_unpack(data):
+        timestamp = datetime.datetime.fromtimestamp(epoch)
+        filename = f"frame_{timestamp.strftime('%Y%m%d_%H%M%S')}.jpg"
+        yield timestamp, session_dir / filename, bool(found), cx, cy, area
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a binary capture log to CSV.')
+    parser.add_argument('log_path', help='Path to capture_log.bin')
+    args = parser.parse_args()
+
+    print("timestamp,filepath,detection_found,center_x,center_y,area,servo_moved")
+    for timestamp, filepath, found, cx, cy, area in parse_log(args.log_path):
+        if found:
+            print(f"{timestamp.isoformat()},{filepath},True,{cx},{cy},{area},True")
+        else:
+            print(f"{timestamp.isoformat()},{filepath},False,,,,False")
+
+
+if __name__ == "__main__":
+    main()